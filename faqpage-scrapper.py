@@ -1,12 +1,26 @@
 import os
-import json
+import re
+import orjson
 import csv
 import datetime
-import requests
-import concurrent.futures
-from lxml import html
+import asyncio
+import aiohttp
+from lxml import etree, html
 from urllib.parse import urlparse
 
+MAX_CONCURRENT_REQUESTS = 50  # Upper bound on in-flight HTTP requests
+MAX_CONNECTIONS_PER_HOST = 20  # Pooled keep-alive connections per host
+MAX_RETRIES = 2  # Retries for connection errors and timeouts
+RETRY_BACKOFF = 0.3  # Seconds; doubled after each failed attempt
+WRITE_BUFFER_SIZE = 1 << 20  # 1 MB buffer for report and saved-page writes
+MAX_PAGE_BYTES = 10 << 20  # Skip pages that advertise a larger Content-Length
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Compiled once at import and reused for every page
+_JSONLD_XPATH = etree.XPath('//script[@type="application/ld+json"]/text()', smart_strings=False)
+_MAIN_XPATH = etree.XPath('//*[@id="main"]/div[3]')
+_FILENAME_RE = re.compile(r'[./]')
+
 class FAQPageScraper:
     """
     A class to scrape web pages, detect JSON-LD FAQPage schema, and save relevant data.
@@ -17,6 +31,7 @@ class FAQPageScraper:
         self.html_dir = os.path.join(self.target_dir, "HTML")
         self.jsonld_dir = os.path.join(self.target_dir, "JSONLD")
         self.report_file = os.path.join(self.target_dir, f"report-{datetime.datetime.today().strftime('%m-%d-%Y')}.csv")
+        self._today = datetime.date.today().strftime('%-m/%-d/%Y')  # Report date, formatted once per run
         self.urls = self.load_urls()
         self.setup_directories()
     
@@ -24,7 +39,7 @@ class FAQPageScraper:
         """Loads URLs from the provided text file."""
         try:
             with open(self.url_file, 'r') as file:
-                return [line.strip() for line in file.readlines() if line.strip()]
+                return [url for line in file if (url := line.strip())]
         except Exception as e:
             print(f"Error loading URLs: {e}")
             return []
@@ -35,75 +50,114 @@ class FAQPageScraper:
         os.makedirs(self.html_dir, exist_ok=True)
         os.makedirs(self.jsonld_dir, exist_ok=True)
     
-    def fetch_page(self, url):
+    async def fetch_page(self, session, semaphore, url):
         """Fetches the web page content and checks for JSON-LD FAQPage schema."""
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with semaphore:
+                    async with session.get(url) as response:
+                        status_code = response.status
+                        if status_code != 200:
+                            return [self._today, url, status_code, 'No']
+                        # Leave PDFs, images, APIs and oversized pages unread; a missing
+                        # Content-Type reads as application/octet-stream, so parse those pages
+                        if "Content-Type" in response.headers and response.content_type not in HTML_CONTENT_TYPES:
+                            return [self._today, url, status_code, 'No']
+                        if (response.content_length or 0) > MAX_PAGE_BYTES:
+                            return [self._today, url, status_code, 'No']
+                        content = await response.read()
+                        charset = response.charset  # Declared in Content-Type, if any
+                break
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == MAX_RETRIES:
+                    print(f"Request failed for {url}: {e}")
+                    return [self._today, url, 'Error', 'No']
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+            except aiohttp.ClientError as e:
+                # Invalid URLs, bad payloads etc. will not succeed on retry
+                print(f"Request failed for {url}: {e}")
+                return [self._today, url, 'Error', 'No']
+
+        # Parsing is CPU-bound, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        faq_detected = await loop.run_in_executor(None, self.process_page, url, content, charset)
+        return [self._today, url, status_code, 'Yes' if faq_detected else 'No']
+
+    def process_page(self, url, content, charset=None):
+        """Detects a JSON-LD FAQPage schema in the page and saves it if found."""
+        # Decode with the HTTP charset; without a usable one lxml falls back to <meta> sniffing
         try:
-            response = requests.get(url, timeout=10)
-            status_code = response.status_code
-            if response.status_code == 200:
-                page_tree = html.fromstring(response.text)
-                json_ld_data = self.extract_json_ld(response.text)
-                faq_detected = any('@type' in data and data['@type'] == 'FAQPage' for data in json_ld_data)
-                if faq_detected:
-                    self.save_faq_data(url, response.text, json_ld_data)
-                return [datetime.datetime.today().strftime('%-m/%-d/%Y'), url, status_code, 'Yes' if faq_detected else 'No']
-            return [datetime.datetime.today().strftime('%-m/%-d/%Y'), url, status_code, 'No']
-        except requests.RequestException as e:
-            print(f"Request failed for {url}: {e}")
-            return [datetime.datetime.today().strftime('%-m/%-d/%Y'), url, 'Error', 'No']
+            parser = html.HTMLParser(encoding=charset) if charset else None
+        except LookupError:
+            parser = None
+        try:
+            tree = html.fromstring(content, parser=parser)
+        except etree.ParserError as e:
+            print(f"Error parsing {url}: {e}")
+            return False
+        json_ld_data = self.extract_json_ld(tree)
+        faq_detected = any('@type' in data and data['@type'] == 'FAQPage' for data in json_ld_data)
+        if faq_detected:
+            self.save_faq_data(url, tree, json_ld_data)
+        return faq_detected
     
-    def extract_json_ld(self, html_content):
-        """Extracts JSON-LD data from the web page."""
+    def extract_json_ld(self, tree):
+        """Extracts FAQPage-bearing JSON-LD data from the parsed web page."""
         try:
-            tree = html.fromstring(html_content)
-            scripts = tree.xpath('//script[@type="application/ld+json"]/text()')
+            scripts = _JSONLD_XPATH(tree)
             json_data = []
             for script in scripts:
+                # Cheap substring check skips decoding blocks that cannot be a FAQPage
+                if 'FAQPage' not in script:
+                    continue
                 try:
-                    json_data.append(json.loads(script))
-                except json.JSONDecodeError:
+                    json_data.append(orjson.loads(script))
+                except orjson.JSONDecodeError:
                     continue
             return json_data
         except Exception as e:
             print(f"Error extracting JSON-LD: {e}")
             return []
     
-    def save_faq_data(self, url, html_content, json_ld_data):
-        """Saves FAQ-related HTML and JSON-LD data."""
+    def save_faq_data(self, url, tree, json_ld_data):
+        """Saves FAQ-related HTML and JSON-LD data from the parsed web page."""
         try:
             parsed_url = urlparse(url)
-            filename = parsed_url.netloc.replace('.', '_') + parsed_url.path.replace('/', '_').strip('_')
+            filename = _FILENAME_RE.sub('_', parsed_url.netloc + parsed_url.path).strip('_')
             
             # Save HTML content
-            tree = html.fromstring(html_content)
-            faq_section = tree.xpath('//*[@id="main"]/div[3]')
+            faq_section = _MAIN_XPATH(tree)
             if faq_section:
-                with open(os.path.join(self.html_dir, f"{filename}.html"), 'w', encoding='utf-8') as file:
-                    file.write(html.tostring(faq_section[0], pretty_print=True).decode('utf-8'))
+                with open(os.path.join(self.html_dir, f"{filename}.html"), 'wb', buffering=WRITE_BUFFER_SIZE) as file:
+                    file.write(html.tostring(faq_section[0], pretty_print=True))
             
             # Save JSON-LD content
-            with open(os.path.join(self.jsonld_dir, f"{filename}.json"), 'w', encoding='utf-8') as file:
-                json.dump(json_ld_data, file, indent=4)
+            with open(os.path.join(self.jsonld_dir, f"{filename}.json"), 'wb', buffering=WRITE_BUFFER_SIZE) as file:
+                file.write(orjson.dumps(json_ld_data, option=orjson.OPT_INDENT_2))
         except Exception as e:
             print(f"Error saving FAQ data for {url}: {e}")
     
     def generate_report(self, results):
         """Generates a CSV report with the collected data."""
         try:
-            with open(self.report_file, 'w', newline='', encoding='utf-8') as file:
+            with open(self.report_file, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as file:
                 writer = csv.writer(file)
                 writer.writerow(["Date", "URL", "Response-Code", "FAQ"])
                 writer.writerows(results)
         except Exception as e:
             print(f"Error writing report: {e}")
     
+    async def fetch_all(self):
+        """Fetches all URLs concurrently over a shared, connection-pooled HTTP session."""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS, limit_per_host=MAX_CONNECTIONS_PER_HOST)
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            return await asyncio.gather(*(self.fetch_page(session, semaphore, url) for url in self.urls))
+    
     def run(self):
-        """Executes the scraping process in parallel."""
-        results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            futures = {executor.submit(self.fetch_page, url): url for url in self.urls}
-            for future in concurrent.futures.as_completed(futures):
-                results.append(future.result())
+        """Executes the scraping process concurrently."""
+        results = asyncio.run(self.fetch_all())
         self.generate_report(results)
         print("Scraping complete. Report generated.")
 
@@ -1,89 +1,151 @@
+import io
 import os
-import json
-import nltk
-from bs4 import BeautifulSoup
+import ijson
+import orjson
+from selectolax.parser import HTMLParser
+from lxml import html
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 # 🔹 Configure paths
 JSONLD_FOLDER = "/Users/mattbriggs/Data/retrievaldata/JSONLD"
 HTML_FOLDER = "/Users/mattbriggs/Data/retrievaldata/HTML"
 OUTPUT_FILE = "golden_questions.json"
 
-# 🔹 Setup NLTK (for basic text cleaning)
-nltk.download("punkt")
-
 # ==============================================================
 # STEP 1: EXTRACT FAQ DATA FROM JSON-LD
 # ==============================================================
 
-def extract_faq_from_jsonld(jsonld_folder):
-    """Extract questions and answers from JSON-LD FAQPage schemas, handling HTML answers."""
+def clean_text(html_text):
+    """Convert an HTML answer to plain text, skipping the parse when there is no markup."""
+    if "<" not in html_text and "&" not in html_text:
+        return html_text
+    return HTMLParser(html_text).text(separator=" ")
+
+def _iter_jsonld_questions(stream):
+    """Stream the mainEntity items of the first JSON-LD object in stream, if it is a FAQPage."""
+    base = None
+    is_faq_page = None
+    pending = []  # Items seen before "@type"; rare, as JSON-LD usually leads with it
+    builder = None
+
+    for prefix, event, value in ijson.parse(stream):
+        if base is None:
+            # Handle if JSON-LD is wrapped in a list: only the first object is used
+            base = "item." if event == "start_array" else ""
+            continue
+
+        if prefix == f"{base}@type" and event == "string":
+            is_faq_page = value == "FAQPage"
+            if not is_faq_page:
+                return  # Bail out without parsing the rest of the document
+            yield from pending
+            pending = []
+        elif builder is None and prefix == f"{base}mainEntity.item" and event == "start_map":
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif builder is not None:
+            builder.event(event, value)
+            if prefix == f"{base}mainEntity.item" and event == "end_map":
+                if is_faq_page:
+                    yield builder.value
+                else:
+                    pending.append(builder.value)
+                builder = None
+        elif prefix == base.rstrip(".") and event not in ("map_key", "start_map", "start_array"):
+            break  # End of the first item, whatever its type (data[0] in a list)
+
+def _extract_faq_from_jsonld_file(path):
+    """Extract questions and answers from a single JSON-LD FAQPage file."""
     golden_data = []
-    
-    for file in os.listdir(jsonld_folder):
-        if file.endswith(".json"):
-            with open(os.path.join(jsonld_folder, file), "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-                # Handle if JSON-LD is wrapped in a list
-                if isinstance(data, list):
-                    data = data[0]  # Extract first object if it's a list
-
-                if "@type" in data and data["@type"] == "FAQPage":
-                    for qa in data.get("mainEntity", []):
-                        if qa.get("@type") == "Question":
-                            question = qa.get("name", "").strip()
-                            answer_html = qa.get("acceptedAnswer", {}).get("text", "").strip()
-                            
-                            # Convert HTML answers to plain text
-                            answer_text = BeautifulSoup(answer_html, "html.parser").get_text(separator=" ")
-
-                            if question and answer_text:
-                                golden_data.append({"question": question, "expected_answer": answer_text})
-
-    print(f"✅ Extracted {len(golden_data)} questions from JSON-LD.")
+
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    # Skip the full parse for files that cannot contain a FAQPage
+    if b'"FAQPage"' not in raw:
+        return golden_data
+
+    # Stream Question objects instead of materialising the whole document
+    for qa in _iter_jsonld_questions(io.BytesIO(raw)):
+        if qa.get("@type") == "Question":
+            question = qa.get("name", "").strip()
+            answer_html = qa.get("acceptedAnswer", {}).get("text", "").strip()
+            
+            # Convert HTML answers to plain text
+            answer_text = clean_text(answer_html)
+
+            if question and answer_text:
+                golden_data.append({"question": question, "expected_answer": answer_text})
+
     return golden_data
 
+def extract_faq_from_jsonld(jsonld_folder):
+    """Yield questions and answers from JSON-LD FAQPage schemas, handling HTML answers."""
+    files = [entry.path for entry in os.scandir(jsonld_folder) if entry.name.endswith(".json") and entry.is_file()]
+
+    # Parse files concurrently; results keep the directory order
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        count = 0
+        for file_data in executor.map(_extract_faq_from_jsonld_file, files):
+            count += len(file_data)
+            yield from file_data
+
+    print(f"✅ Extracted {count} questions from JSON-LD.")
+
 # ==============================================================
 # STEP 2: EXTRACT FAQ DATA FROM HTML
 # ==============================================================
 
-def extract_faq_from_html(html_folder):
-    """Extract questions and answers from HTML FAQ sections, handling nested content properly."""
+def _extract_faq_from_html_file(path):
+    """Extract questions and answers from the FAQ section of a single HTML file."""
     golden_data = []
 
-    for file in os.listdir(html_folder):
-        if file.endswith(".html"):
-            with open(os.path.join(html_folder, file), "r", encoding="utf-8") as f:
-                soup = BeautifulSoup(f, "html.parser")
+    tree = html.parse(path, html.HTMLParser(encoding="utf-8"))
+    if tree.getroot() is None:
+        return golden_data  # Empty, whitespace-only or comment-only file
 
-                # Find the FAQ content container
-                faq_section = soup.find("section", id="faq-content-container")
-                if faq_section:
-                    # Iterate through h3 elements (questions) and extract their answers
-                    for question_tag in faq_section.find_all("h3"):
-                        question = question_tag.get_text(strip=True)
+    # Iterate through h3 elements (questions) in the FAQ content container
+    for question_tag in tree.xpath('//section[@id="faq-content-container"]//h3'):
+        question = "".join(t.strip() for t in question_tag.itertext())
 
-                        # The answer is typically in the next div with class 'content'
-                        answer_div = question_tag.find_next_sibling("div", class_="content")
+        # The answer is typically in the next div with class 'content'
+        answer_div = question_tag.xpath(
+            './following-sibling::div[contains(concat(" ", normalize-space(@class), " "), " content ")][1]'
+        )
 
-                        if answer_div:
-                            # Extract text while preserving paragraph structure
-                            answer_text = ' '.join(p.get_text(strip=True) for p in answer_div.find_all("p"))
+        if answer_div:
+            # Extract text while preserving paragraph structure
+            answer_text = ' '.join(
+                "".join(t.strip() for t in p.itertext()) for p in answer_div[0].iter("p")
+            )
 
-                            if question and answer_text:
-                                golden_data.append({"question": question, "expected_answer": answer_text})
+            if question and answer_text:
+                golden_data.append({"question": question, "expected_answer": answer_text})
 
-    print(f"✅ Extracted {len(golden_data)} questions from HTML.")
     return golden_data
 
+def extract_faq_from_html(html_folder):
+    """Yield questions and answers from HTML FAQ sections, handling nested content properly."""
+    files = [entry.path for entry in os.scandir(html_folder) if entry.name.endswith(".html") and entry.is_file()]
+
+    # lxml releases the GIL while parsing, so files are parsed concurrently
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        count = 0
+        for file_data in executor.map(_extract_faq_from_html_file, files):
+            count += len(file_data)
+            yield from file_data
+
+    print(f"✅ Extracted {count} questions from HTML.")
+
 # ==============================================================
 # STEP 3: MERGE AND DEDUPLICATE DATA
 # ==============================================================
 
 def merge_and_deduplicate(jsonld_questions, html_questions):
-    """Merge questions from JSON-LD and HTML, removing duplicates."""
-    merged = {q["question"]: q["expected_answer"] for q in jsonld_questions}  # JSON-LD baseline
-    for q in html_questions:
+    """Merge questions from JSON-LD and HTML in a single pass, removing duplicates."""
+    merged = {}
+    for q in chain(jsonld_questions, html_questions):  # JSON-LD baseline first
         merged[q["question"]] = q["expected_answer"]  # HTML version may have slight differences
 
     final_golden_questions = [{"question": q, "expected_answer": a} for q, a in merged.items()]
@@ -103,8 +165,8 @@ def main():
     golden_questions = merge_and_deduplicate(jsonld_questions, html_questions)
 
     # 🔹 Save to JSON
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(golden_questions, f, indent=4)
+    with open(OUTPUT_FILE, "wb") as f:
+        f.write(orjson.dumps(golden_questions, option=orjson.OPT_INDENT_2))
 
     print(f"✅ Golden dataset saved to {OUTPUT_FILE}")
 
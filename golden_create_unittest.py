@@ -0,0 +1,135 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from golden_create import _extract_faq_from_jsonld_file, _iter_jsonld_questions, clean_text
+
+QUESTION_1 = {"@type": "Question", "name": "What is Azure?", "acceptedAnswer": {"@type": "Answer", "text": "<p>A cloud.</p>"}}
+QUESTION_2 = {"@type": "Question", "name": "Is it free?", "acceptedAnswer": {"@type": "Answer", "text": "Partly &amp; sometimes."}}
+
+# ==============================================================
+# REFERENCE: ORIGINAL json.load + data[0] BEHAVIOUR
+# ==============================================================
+
+def reference_questions(raw):
+    """Return the mainEntity items the original json.load-based extractor iterated."""
+    data = json.loads(raw)
+    if isinstance(data, list):
+        data = data[0]
+    if "@type" in data and data["@type"] == "FAQPage":
+        return data.get("mainEntity", [])
+    return []
+
+def streamed_questions(raw):
+    """Return the mainEntity items yielded by the streaming ijson walker."""
+    return list(_iter_jsonld_questions(io.BytesIO(raw)))
+
+# ==============================================================
+# UNIT TEST CLASS
+# ==============================================================
+
+class TestIterJsonldQuestions(unittest.TestCase):
+
+    def assertMatchesReference(self, document):
+        raw = json.dumps(document).encode("utf-8")
+        self.assertEqual(streamed_questions(raw), reference_questions(raw), "❌ Streamed questions differ from json.load.")
+
+    # ==============================================================
+    # TEST 1: PLAIN AND LIST-WRAPPED DOCUMENTS
+    # ==============================================================
+    def test_1_plain_faq_page(self):
+        """Test a single FAQPage object."""
+        self.assertMatchesReference({"@context": "https://schema.org", "@type": "FAQPage", "mainEntity": [QUESTION_1, QUESTION_2]})
+
+    def test_1_list_wrapped_faq_page(self):
+        """Test a FAQPage wrapped in a list, followed by other objects that must be ignored."""
+        self.assertMatchesReference([
+            {"@type": "FAQPage", "mainEntity": [QUESTION_1]},
+            {"@type": "FAQPage", "mainEntity": [QUESTION_2]},
+        ])
+
+    def test_1_list_wrapped_faq_page_not_first(self):
+        """Test that only the first object of a list is used, as with data[0]."""
+        self.assertMatchesReference([
+            {"@type": "WebPage", "name": "Home"},
+            {"@type": "FAQPage", "mainEntity": [QUESTION_1]},
+        ])
+
+    def test_1_list_first_item_not_an_object(self):
+        """Test that a scalar or array as the first list item yields nothing, as with data[0]."""
+        faq_page = {"@type": "FAQPage", "mainEntity": [QUESTION_1]}
+        for first in ("x", 1, None, [1], [[{"@type": "FAQPage"}]], {}):
+            raw = json.dumps([first, faq_page]).encode("utf-8")
+            self.assertEqual(streamed_questions(raw), [], f"❌ Walker read past first item {first!r}.")
+
+    # ==============================================================
+    # TEST 2: KEY ORDER AND NESTING
+    # ==============================================================
+    def test_2_type_after_main_entity(self):
+        """Test that items seen before '@type' are yielded once the FAQPage type is known."""
+        self.assertMatchesReference({"mainEntity": [QUESTION_1, QUESTION_2], "@type": "FAQPage"})
+
+    def test_2_type_after_main_entity_not_faq_page(self):
+        """Test that buffered items are dropped when '@type' turns out not to be FAQPage."""
+        self.assertMatchesReference({"mainEntity": [QUESTION_1], "@type": "WebPage"})
+
+    def test_2_missing_type(self):
+        """Test a document with no '@type' at all."""
+        self.assertMatchesReference({"mainEntity": [QUESTION_1]})
+
+    def test_2_nested_main_entity_ignored(self):
+        """Test that a mainEntity below the top-level object is not treated as questions."""
+        self.assertMatchesReference({
+            "@type": "FAQPage",
+            "about": {"@type": "Thing", "mainEntity": [QUESTION_2]},
+            "mainEntity": [QUESTION_1],
+        })
+
+    def test_2_empty_and_missing_main_entity(self):
+        """Test FAQPage documents with an empty or absent mainEntity."""
+        self.assertMatchesReference({"@type": "FAQPage", "mainEntity": []})
+        self.assertMatchesReference({"@type": "FAQPage"})
+
+    # ==============================================================
+    # TEST 3: EARLY EXIT
+    # ==============================================================
+    def test_3_bails_out_on_other_type(self):
+        """Test that a non-FAQPage document stops parsing before the rest is read."""
+        raw = b'{"@type": "WebPage", "mainEntity": [ this is not JSON'
+        self.assertEqual(streamed_questions(raw), [], "❌ Walker did not stop at a non-FAQPage '@type'.")
+
+    def test_3_stops_after_first_object(self):
+        """Test that parsing stops at the end of the first object in a list."""
+        first = json.dumps({"@type": "FAQPage", "mainEntity": [QUESTION_1]}).encode("utf-8")
+        raw = b"[" + first + b", { this is not JSON"
+        self.assertEqual(streamed_questions(raw), [QUESTION_1], "❌ Walker read past the first object.")
+
+# ==============================================================
+# FILE-LEVEL EXTRACTION
+# ==============================================================
+
+class TestExtractFaqFromJsonldFile(unittest.TestCase):
+
+    def extract(self, document):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "faq.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(document, f)
+            return _extract_faq_from_jsonld_file(path)
+
+    def test_1_questions_and_answers(self):
+        """Test that Question items become cleaned question/answer pairs."""
+        expected = [
+            {"question": q["name"], "expected_answer": clean_text(q["acceptedAnswer"]["text"])}
+            for q in (QUESTION_1, QUESTION_2)
+        ]
+        self.assertEqual(self.extract([{"@type": "FAQPage", "mainEntity": [QUESTION_1, QUESTION_2]}]), expected)
+
+    def test_2_non_faq_page_file(self):
+        """Test that files without a FAQPage marker yield nothing."""
+        self.assertEqual(self.extract({"@type": "WebPage", "mainEntity": [QUESTION_1]}), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,17 @@
 import os
-import json
+import hashlib
+import orjson
+import platform
+import zipfile
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
 import weaviate
 import weaviate.classes.config as wc
-import nltk
 import textwrap
 from bs4 import BeautifulSoup
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
 
 # ==============================================================
 # CONFIGURATION
@@ -19,6 +23,16 @@ GOLDEN_QUESTIONS_FILE = "golden_questions.json"
 OUTPUT_F1_JSON = "HTML_F1_result.json"
 
 MAX_TOKENS = 8000  # To avoid exceeding OpenAI token limits
+MAX_QUERY_WORKERS = 16  # Concurrent Weaviate queries during evaluation
+
+# INT8-quantized ONNX export of all-MiniLM-L6-v2, picked for the CPU architecture
+ONNX_MODEL_FILE = (
+    "onnx/model_qint8_arm64.onnx" if platform.machine() in ("arm64", "aarch64") else "onnx/model_quint8_avx2.onnx"
+)
+
+# Expected-answer embeddings persisted across runs, keyed by model build and answer text
+GOLDEN_EMBEDDINGS_CACHE = "golden_emb.npz"
+MODEL_VARIANT = "all-MiniLM-L6-v2:" + ("cuda-fp16" if torch.cuda.is_available() else ONNX_MODEL_FILE)
 
 # OpenAI API Key (Ensure this is set in the environment)
 OPENAI_API_KEY = os.getenv("OPENAI_APIKEY")
@@ -26,10 +40,16 @@ OPENAI_API_KEY = os.getenv("OPENAI_APIKEY")
 if not OPENAI_API_KEY:
     raise ValueError("❌ OpenAI API Key is missing! Set OPENAI_APIKEY in environment.")
 
-nltk.download("punkt")
-nltk.download("stopwords")
-stop_words = set(stopwords.words("english"))
-model = SentenceTransformer("all-MiniLM-L6-v2")
+@lru_cache(maxsize=1)
+def get_model():
+    """Loads the SentenceTransformer model on first use: FP16 on CUDA, quantized ONNX Runtime on CPU."""
+    if torch.cuda.is_available():
+        return SentenceTransformer("all-MiniLM-L6-v2", device="cuda").half()
+    return SentenceTransformer(
+        "all-MiniLM-L6-v2",
+        backend="onnx",
+        model_kwargs={"file_name": ONNX_MODEL_FILE, "provider": "CPUExecutionProvider"},
+    )
 
 # ==============================================================
 # STEP 1: CONNECT TO WEAVIATE
@@ -92,11 +112,13 @@ def truncate_text(text, max_tokens=MAX_TOKENS):
 def extract_text_from_html(html_path):
     """Extracts title, text, and source from an HTML page."""
     with open(html_path, "r", encoding="utf-8") as file:
-        soup = BeautifulSoup(file, "html.parser")
+        soup = BeautifulSoup(file, "lxml")
 
     title = soup.title.string if soup.title else "Untitled"
-    paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
-    headers = [h.get_text(strip=True) for h in soup.find_all(["h1", "h2", "h3"])]
+    # Collect paragraphs and headers in a single tree walk
+    paragraphs, headers = [], []
+    for tag in soup.find_all(["p", "h1", "h2", "h3"]):
+        (paragraphs if tag.name == "p" else headers).append(tag.get_text(strip=True))
 
     return {
         "title": title,
@@ -107,11 +129,11 @@ def extract_text_from_html(html_path):
 def load_html_data():
     """Loads all HTML documents from the specified folder."""
     html_texts = []
-    for filename in os.listdir(HTML_FOLDER):
-        if filename.endswith(".html"):
-            html_path = os.path.join(HTML_FOLDER, filename)
-            extracted = extract_text_from_html(html_path)
-            html_texts.append(extracted)
+    with os.scandir(HTML_FOLDER) as entries:
+        for entry in entries:
+            if entry.name.endswith(".html") and entry.is_file():
+                extracted = extract_text_from_html(entry.path)
+                html_texts.append(extracted)
     return html_texts
 
 html_data = load_html_data()
@@ -127,24 +149,22 @@ def chunk_text(text, max_tokens=8000):
     return textwrap.wrap(text, width=max_tokens)
 
 def upload_to_weaviate(html_data):
-    """Uploads extracted FAQ data to Weaviate, ensuring text is within token limits."""
+    """Uploads extracted FAQ data to Weaviate in batches, ensuring text is within token limits."""
     collection = client.collections.get("HTMLDocument")
 
-    for doc in html_data:
-        text_chunks = chunk_text(doc["text"])  # Ensure the text is within limits
+    with collection.batch.dynamic() as batch:
+        for doc in html_data:
+            text_chunks = chunk_text(doc["text"])  # Ensure the text is within limits
 
-        for chunk in text_chunks:
-            data_object = {
-                "title": doc["title"],
-                "text": chunk,  # Store the chunked text
-                "source": doc["source"]
-            }
+            for chunk in text_chunks:
+                batch.add_object(properties={
+                    "title": doc["title"],
+                    "text": chunk,  # Store the chunked text
+                    "source": doc["source"]
+                })
 
-            try:
-                collection.data.insert(data_object)
-                print(f"✅ Inserted document '{doc['title']}' successfully.")
-            except Exception as e:
-                print(f"❌ Error inserting document '{doc['title']}': {e}")
+    for failed in collection.batch.failed_objects:
+        print(f"❌ Error inserting document '{failed.object_.properties['title']}': {failed.message}")
 
     print("✅ All documents uploaded to Weaviate.")
 
@@ -154,8 +174,7 @@ def upload_to_weaviate(html_data):
 
 def query_weaviate(question):
     """Queries Weaviate for the best matching answer to a question."""
-    collection = client.collections.get("HTMLDocument")  # Retrieve the correct collection
-
+    # Uses the module-level collection handle, shared across query threads
     response = collection.query.near_text(question, limit=1)  # Remove `.do()`
 
     # Extract the most relevant result if available
@@ -168,8 +187,8 @@ def query_weaviate(question):
 # STEP 6: LOAD GOLDEN QUESTIONS
 # ==============================================================
 
-with open(GOLDEN_QUESTIONS_FILE, "r") as f:
-    golden_questions = json.load(f)
+with open(GOLDEN_QUESTIONS_FILE, "rb") as f:
+    golden_questions = orjson.loads(f.read())
 
 print(f"✅ Loaded {len(golden_questions)} golden questions.")
 
@@ -177,22 +196,49 @@ print(f"✅ Loaded {len(golden_questions)} golden questions.")
 # STEP 7: COMPUTE F1 SCORE
 # ==============================================================
 
-def compute_f1(pred_answer, expected_answer):
-    """Computes the F1-score based on cosine similarity."""
-    pred_embedding = model.encode(pred_answer, convert_to_tensor=True)
-    exp_embedding = model.encode(expected_answer, convert_to_tensor=True)
-    return util.pytorch_cos_sim(pred_embedding, exp_embedding).item()
+def encode_expected_answers(expected_answers):
+    """Encodes expected answers, reusing embeddings cached on disk for unchanged answers."""
+    keys = [
+        hashlib.blake2b(f"{MODEL_VARIANT}\n{answer}".encode(), digest_size=16).hexdigest()
+        for answer in expected_answers
+    ]
+    try:
+        with np.load(GOLDEN_EMBEDDINGS_CACHE) as npz:
+            cache = dict(npz)
+    except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+        cache = {}  # Missing or damaged cache; re-encode everything
+
+    # Only encode answers not seen in a previous run
+    missing = {key: answer for key, answer in zip(keys, expected_answers) if key not in cache}
+    if missing:
+        embeddings = get_model().encode(list(missing.values()), batch_size=64, normalize_embeddings=True)
+        cache.update(zip(missing, embeddings.astype(np.float32, copy=False)))
+        # Write to a temp file and swap it in, so an interrupted run cannot leave a damaged cache
+        tmp_path = GOLDEN_EMBEDDINGS_CACHE + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **cache)
+        os.replace(tmp_path, GOLDEN_EMBEDDINGS_CACHE)
+
+    return np.stack([cache[key] for key in keys])
+
+def compute_f1_scores(pred_answers, expected_answers):
+    """Computes the F1-scores based on cosine similarity, encoding all answers in batches."""
+    # Normalized embeddings make the dot product a cosine
+    pred_embeddings = get_model().encode(pred_answers, batch_size=64, normalize_embeddings=True)
+    pred_embeddings = pred_embeddings.astype(np.float32, copy=False)  # Score in float32 even when the model ran in FP16
+    exp_embeddings = encode_expected_answers(expected_answers)
+    return np.einsum("ij,ij->i", pred_embeddings, exp_embeddings).tolist()
 
 def evaluate_f1_score():
     """Evaluates the F1 score for Weaviate retrieval performance."""
     results = []
-    f1_scores = []
 
-    for q in golden_questions:
-        retrieved_answer = query_weaviate(q["question"])
-        f1 = compute_f1(retrieved_answer, q["expected_answer"])
-        f1_scores.append(f1)
+    # Retrieval is network-bound, so run the queries concurrently (results keep question order)
+    with ThreadPoolExecutor(max_workers=MAX_QUERY_WORKERS) as executor:
+        retrieved_answers = list(executor.map(query_weaviate, [q["question"] for q in golden_questions]))
+    f1_scores = compute_f1_scores(retrieved_answers, [q["expected_answer"] for q in golden_questions])
 
+    for q, retrieved_answer, f1 in zip(golden_questions, retrieved_answers, f1_scores):
         results.append({
             "question": q["question"],
             "expected_answer": q["expected_answer"],
@@ -204,8 +250,8 @@ def evaluate_f1_score():
     print(f"📊 Average F1 Score: {average_f1:.3f}")
 
     # Save detailed results to JSON
-    with open(OUTPUT_F1_JSON, "w") as f:
-        json.dump({"average_f1": average_f1, "results": results}, f, indent=4)
+    with open(OUTPUT_F1_JSON, "wb") as f:
+        f.write(orjson.dumps({"average_f1": average_f1, "results": results}, option=orjson.OPT_INDENT_2))
 
     print(f"✅ F1 scores saved to {OUTPUT_F1_JSON}")
 
@@ -1,7 +0,0 @@
-import nltk
-
-# Download required NLTK corpus data
-nltk.download("punkt")      # Tokenization models
-nltk.download("stopwords")  # Stopwords dataset
-
-print("NLTK corpora downloaded successfully!")
\ No newline at end of file
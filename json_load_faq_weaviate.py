@@ -1,13 +1,19 @@
 import os
-import json
+import hashlib
+import orjson
+import platform
+import zipfile
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
 import weaviate
 import weaviate.classes.config as wc
-import nltk
 import textwrap
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from sentence_transformers import SentenceTransformer, util
-import subprocess
+from sentence_transformers import SentenceTransformer
+import docker
+from docker.errors import DockerException
 
 # ==============================================================
 # CONFIGURATION
@@ -17,39 +23,76 @@ WEAVIATE_URL = "http://localhost:8080"  # Adjust if running remotely
 GOLDEN_QUESTIONS_FILE = "golden_questions.json"
 OUTPUT_F1_JSON = "json_f1_result-vector-related.json"
 MAX_TOKENS = 8000  # To avoid exceeding OpenAI token limits
-
-# Download NLTK resources if not already present
-nltk.download("punkt")
-nltk.download("stopwords")
-stop_words = set(stopwords.words("english"))
-
-# Load SentenceTransformer model
-model = SentenceTransformer("all-MiniLM-L6-v2")
+MAX_QUERY_WORKERS = 16  # Concurrent Weaviate queries during evaluation
+OPENAI_KEY_CACHE_FILE = os.path.expanduser("~/.cache/weaviate_openai.json")
+OPENAI_KEY_CACHE_TTL = 24 * 60 * 60  # Seconds before the cached key is re-read from the container
+
+# INT8-quantized ONNX export of all-MiniLM-L6-v2, picked for the CPU architecture
+ONNX_MODEL_FILE = (
+    "onnx/model_qint8_arm64.onnx" if platform.machine() in ("arm64", "aarch64") else "onnx/model_quint8_avx2.onnx"
+)
+
+# Expected-answer embeddings persisted across runs, keyed by model build and answer text
+GOLDEN_EMBEDDINGS_CACHE = "golden_emb.npz"
+MODEL_VARIANT = "all-MiniLM-L6-v2:" + ("cuda-fp16" if torch.cuda.is_available() else ONNX_MODEL_FILE)
+
+@lru_cache(maxsize=1)
+def get_model():
+    """Loads the SentenceTransformer model on first use: FP16 on CUDA, quantized ONNX Runtime on CPU."""
+    if torch.cuda.is_available():
+        return SentenceTransformer("all-MiniLM-L6-v2", device="cuda").half()
+    return SentenceTransformer(
+        "all-MiniLM-L6-v2",
+        backend="onnx",
+        model_kwargs={"file_name": ONNX_MODEL_FILE, "provider": "CPUExecutionProvider"},
+    )
 
 # ==============================================================
 # STEP 1: CONNECT TO WEAVIATE AND FETCH API KEY
 # ==============================================================
 
-def get_openai_api_key(container_name="weaviate"):
-    """Retrieve OpenAI API Key from the Weaviate Docker container's environment variables."""
+def load_cached_openai_api_key():
+    """Return the locally cached OpenAI API Key, or None if it is missing or older than the TTL."""
     try:
-        result = subprocess.run(
-            ["docker", "exec", container_name, "env"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
+        with open(OPENAI_KEY_CACHE_FILE, "rb") as f:
+            cached = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+    if not isinstance(cached, dict) or not isinstance(cached.get("ts"), (int, float)):
+        return None  # Unexpected cache contents; re-read from the container
+    if time.time() - cached["ts"] < OPENAI_KEY_CACHE_TTL:
+        return cached.get("key")
+    return None
+
+def save_cached_openai_api_key(api_key):
+    """Cache the OpenAI API Key locally, readable by the current user only."""
+    os.makedirs(os.path.dirname(OPENAI_KEY_CACHE_FILE), exist_ok=True)
+    fd = os.open(OPENAI_KEY_CACHE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)  # The mode above only applies when the file is created
+    with os.fdopen(fd, "wb") as f:
+        f.write(orjson.dumps({"key": api_key, "ts": time.time()}))
 
-        for line in result.stdout.split("\n"):
-            if "OPENAI_APIKEY=" in line:
-                return line.split("=")[1].strip()
-
-        raise ValueError("❌ OpenAI API Key not found in Weaviate container.")
+def get_openai_api_key(container_name="weaviate"):
+    """Retrieve OpenAI API Key from the local cache or the Weaviate Docker container's environment variables."""
+    api_key = load_cached_openai_api_key()
+    if api_key:
+        return api_key
 
-    except subprocess.CalledProcessError as e:
+    try:
+        container_env = docker.from_env().containers.get(container_name).attrs["Config"]["Env"] or []
+    except DockerException as e:
         raise RuntimeError(f"❌ ERROR: Unable to retrieve API key from container '{container_name}': {e}")
 
-# Fetch the OpenAI API Key from the running Weaviate container
+    for line in container_env:
+        if line.startswith("OPENAI_APIKEY="):
+            api_key = line.split("=", 1)[1].strip()
+            save_cached_openai_api_key(api_key)
+            return api_key
+
+    raise ValueError("❌ OpenAI API Key not found in Weaviate container.")
+
+# Fetch the OpenAI API Key from the local cache or the running Weaviate container
 OPENAI_API_KEY = get_openai_api_key()
 
 print(f"✅ Retrieved OpenAI API Key from Weaviate: {OPENAI_API_KEY[:6]}***")  # Masked for security
@@ -102,24 +145,24 @@ collection = create_collection()
 # ==============================================================
 
 def load_faq_data():
-    """Loads FAQ data from JSON and inserts it into Weaviate."""
-    with open(GOLDEN_QUESTIONS_FILE, "r") as f:
-        faq_data = json.load(f)
+    """Loads FAQ data from JSON and inserts it into Weaviate in batches."""
+    with open(GOLDEN_QUESTIONS_FILE, "rb") as f:
+        faq_data = orjson.loads(f.read())
 
     print(f"📥 Loading {len(faq_data)} FAQs into Weaviate...")
 
-    for faq in faq_data:
-        data_object = {
-            "question": faq["question"],
-            "answer": faq["expected_answer"]
-        }
-        try:
-            collection.data.insert(data_object)
-            print(f"✅ Inserted: {faq['question']}")
-        except Exception as e:
-            print(f"❌ Error inserting {faq['question']}: {e}")
+    with collection.batch.dynamic() as batch:
+        for faq in faq_data:
+            batch.add_object(properties={
+                "question": faq["question"],
+                "answer": faq["expected_answer"]
+            })
+
+    failed_objects = collection.batch.failed_objects
+    for failed in failed_objects:
+        print(f"❌ Error inserting {failed.object_.properties['question']}: {failed.message}")
 
-    print("✅ All FAQs uploaded to Weaviate.")
+    print(f"✅ Uploaded {len(faq_data) - len(failed_objects)} of {len(faq_data)} FAQs to Weaviate.")
 
 load_faq_data()
 
@@ -129,8 +172,7 @@ load_faq_data()
 
 def query_weaviate(question):
     """Queries Weaviate for the best matching answer to a question."""
-    collection = client.collections.get("FAQ")
-
+    # Uses the module-level collection handle, shared across query threads
     try:
         # Corrected syntax: Pass the question string directly
         response = collection.query.near_text(question, limit=1)
@@ -150,28 +192,55 @@ def query_weaviate(question):
 # STEP 5: COMPUTE F1 SCORE
 # ==============================================================
 
-def compute_f1(pred_answer, expected_answer):
-    """Computes the F1-score based on cosine similarity."""
-    if not pred_answer.strip():
-        return 0.0  # Return 0 score if no answer was retrieved
-
-    pred_embedding = model.encode(pred_answer, convert_to_tensor=True)
-    exp_embedding = model.encode(expected_answer, convert_to_tensor=True)
-    return util.pytorch_cos_sim(pred_embedding, exp_embedding).item()
+def encode_expected_answers(expected_answers):
+    """Encodes expected answers, reusing embeddings cached on disk for unchanged answers."""
+    keys = [
+        hashlib.blake2b(f"{MODEL_VARIANT}\n{answer}".encode(), digest_size=16).hexdigest()
+        for answer in expected_answers
+    ]
+    try:
+        with np.load(GOLDEN_EMBEDDINGS_CACHE) as npz:
+            cache = dict(npz)
+    except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+        cache = {}  # Missing or damaged cache; re-encode everything
+
+    # Only encode answers not seen in a previous run
+    missing = {key: answer for key, answer in zip(keys, expected_answers) if key not in cache}
+    if missing:
+        embeddings = get_model().encode(list(missing.values()), batch_size=64, normalize_embeddings=True)
+        cache.update(zip(missing, embeddings.astype(np.float32, copy=False)))
+        # Write to a temp file and swap it in, so an interrupted run cannot leave a damaged cache
+        tmp_path = GOLDEN_EMBEDDINGS_CACHE + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **cache)
+        os.replace(tmp_path, GOLDEN_EMBEDDINGS_CACHE)
+
+    return np.stack([cache[key] for key in keys])
+
+def compute_f1_scores(pred_answers, expected_answers):
+    """Computes the F1-scores based on cosine similarity, encoding all answers in batches."""
+    # Normalized embeddings make the dot product a cosine
+    pred_embeddings = get_model().encode(pred_answers, batch_size=64, normalize_embeddings=True)
+    pred_embeddings = pred_embeddings.astype(np.float32, copy=False)  # Score in float32 even when the model ran in FP16
+    exp_embeddings = encode_expected_answers(expected_answers)
+    scores = np.einsum("ij,ij->i", pred_embeddings, exp_embeddings).tolist()
+
+    # Return 0 score if no answer was retrieved
+    return [score if pred.strip() else 0.0 for pred, score in zip(pred_answers, scores)]
 
 def evaluate_f1_score():
     """Evaluates the F1 score for Weaviate retrieval performance."""
     results = []
-    f1_scores = []
 
-    with open(GOLDEN_QUESTIONS_FILE, "r") as f:
-        golden_questions = json.load(f)
+    with open(GOLDEN_QUESTIONS_FILE, "rb") as f:
+        golden_questions = orjson.loads(f.read())
 
-    for q in golden_questions:
-        retrieved_answer = query_weaviate(q["question"])
-        f1 = compute_f1(retrieved_answer, q["expected_answer"])
-        f1_scores.append(f1)
+    # Retrieval is network-bound, so run the queries concurrently (results keep question order)
+    with ThreadPoolExecutor(max_workers=MAX_QUERY_WORKERS) as executor:
+        retrieved_answers = list(executor.map(query_weaviate, [q["question"] for q in golden_questions]))
+    f1_scores = compute_f1_scores(retrieved_answers, [q["expected_answer"] for q in golden_questions])
 
+    for q, retrieved_answer, f1 in zip(golden_questions, retrieved_answers, f1_scores):
         results.append({
             "question": q["question"],
             "expected_answer": q["expected_answer"],
@@ -188,8 +257,8 @@ def evaluate_f1_score():
     print(f"📊 Average F1 Score: {average_f1:.3f}")
 
     # Save detailed results to JSON
-    with open(OUTPUT_F1_JSON, "w") as f:
-        json.dump({"average_f1": average_f1, "results": results}, f, indent=4)
+    with open(OUTPUT_F1_JSON, "wb") as f:
+        f.write(orjson.dumps({"average_f1": average_f1, "results": results}, option=orjson.OPT_INDENT_2))
 
     print(f"✅ F1 scores saved to {OUTPUT_F1_JSON}")
 
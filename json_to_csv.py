@@ -1,10 +1,10 @@
-import json
+import orjson
 import csv
 
 def convert_json_to_csv(json_file, csv_file):
     # Load the JSON data
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(json_file, 'rb') as f:
+        data = orjson.loads(f.read())
     
     # Extract the "detailed_results" array
     results = data.get("results", [])
@@ -14,9 +14,12 @@ def convert_json_to_csv(json_file, csv_file):
     
     # Write to CSV
     with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(
+            (r.get("question", ""), r.get("expected_answer", ""), r.get("retrieved_answer", ""), r.get("f1_score", 0.0))
+            for r in results
+        )
     
     print(f"CSV file '{csv_file}' has been created successfully.")
 